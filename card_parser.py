@@ -12,11 +12,14 @@ File format:
 Filename pattern: *_cards.tex
 """
 
+import bisect
+import functools
+import mmap
 import re
 import os
-import glob
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
 
@@ -26,28 +29,55 @@ FLASHCARD_FILE_PATTERN = r".*_cards\.tex$"
 # Compiled regex for file matching
 FLASHCARD_FILE_RE = re.compile(FLASHCARD_FILE_PATTERN)
 
+# Compiled regexes for parsing card files
+# Format: %@rep:card-id:date:interval:ease:reps
+_REP_RE = re.compile(r'%@rep:([^:]+):(.+)')
+_SECTION_RE = re.compile(r'\\section\{([^}]+)\}')
+# Pattern: \begin{flashcard}{id} ... \Q{...} ... \A{...} ... \end{flashcard}
+_CARD_RE = re.compile(r'\\begin\{flashcard\}\{([^}]+)\}(.*?)\\end\{flashcard\}', re.DOTALL)
+_Q_RE = re.compile(r'\\Q(?:block)?\{((?:[^{}]|\{[^{}]*\})*)\}')
+_A_RE = re.compile(r'\\A(?:block)?\{((?:[^{}]|\{[^{}]*\})*)\}')
+# Flashcard environment delimiters, located with str.find when parsing
+_CARD_BEGIN = '\\begin{flashcard}{'
+_CARD_END = '\\end{flashcard}'
+# Byte-pattern siblings, used when parsing a memory-mapped file
+_REP_RE_B = re.compile(rb'%@rep:([^:]+):([^\r\n]+)')  # CR is a newline in text mode
+_SECTION_RE_B = re.compile(rb'\\section\{([^}]+)\}')
+_CARD_BEGIN_B = _CARD_BEGIN.encode()
+_CARD_END_B = _CARD_END.encode()
+# Files larger than this are memory-mapped instead of read into a str
+_MMAP_THRESHOLD = 256 * 1024
+# A whole %@rep: line, including its trailing newline
+_REP_LINE_RE = re.compile(r'%@rep:([^:\n]+):[^\n]*\n?')
 
-@dataclass
+
+@dataclass(slots=True)
 class RepetitionData:
     """Spaced repetition data for a card (SM-2 algorithm style)."""
     last_review: date | None = None
     interval: int = 1  # Days until next review
     ease_factor: float = 2.5  # Ease factor (min 1.3)
     repetitions: int = 0  # Number of successful reviews in a row
+    _next_review: date | None = field(default=None, init=False, repr=False, compare=False)
     
     def next_review_date(self) -> date | None:
-        """Calculate the next review date."""
+        """Calculate the next review date (cached until the next update)."""
         if self.last_review is None:
             return None
-        from datetime import timedelta
-        return self.last_review + timedelta(days=self.interval)
+        if self._next_review is None:
+            self._next_review = self.last_review + timedelta(days=self.interval)
+        return self._next_review
     
     def is_due(self) -> bool:
         """Check if the card is due for review."""
+        return self.is_due_for(date.today())
+    
+    def is_due_for(self, today: date) -> bool:
+        """Check if the card is due for review as of a given date."""
         next_date = self.next_review_date()
         if next_date is None:
             return True  # Never reviewed
-        return date.today() >= next_date
+        return today >= next_date
     
     def update(self, quality: int) -> None:
         """Update repetition data based on recall quality (0-5).
@@ -61,6 +91,7 @@ class RepetitionData:
         5 - Perfect response
         """
         self.last_review = date.today()
+        self._next_review = None
         
         if quality < 3:
             # Failed - reset
@@ -87,18 +118,19 @@ class RepetitionData:
     @classmethod
     def from_string(cls, s: str) -> "RepetitionData":
         """Parse from string format."""
-        parts = s.split(":")
-        if len(parts) >= 3:
-            date_str = parts[0]
-            last_review = None if date_str == "none" else date.fromisoformat(date_str)
-            interval = int(parts[1])
-            ease = float(parts[2])
-            reps = int(parts[3]) if len(parts) > 3 else 0
-            return cls(last_review=last_review, interval=interval, ease_factor=ease, repetitions=reps)
-        return cls()
-
-
-@dataclass 
+        # Only the first four fields are used; don't split the rest
+        parts = s.split(":", 4)
+        if len(parts) < 3:
+            return cls()
+        date_str = parts[0]
+        last_review = None if date_str == "none" else date.fromisoformat(date_str)
+        interval = int(parts[1])
+        ease = float(parts[2])
+        reps = int(parts[3]) if len(parts) > 3 else 0
+        return cls(last_review=last_review, interval=interval, ease_factor=ease, repetitions=reps)
+
+
+@dataclass(slots=True)
 class FlashCard:
     """A flashcard with question, answer, metadata, and repetition data."""
     id: str
@@ -107,21 +139,53 @@ class FlashCard:
     section: str = "General"
     source_file: str = ""
     rep_data: RepetitionData = field(default_factory=RepetitionData)
+    # Due status, computed on construction; see refresh_due()
+    _due: bool = field(default=True, init=False, repr=False, compare=False)
+    
+    def __post_init__(self) -> None:
+        self.refresh_due()
     
     def is_due(self) -> bool:
-        """Check if card is due for review."""
-        return self.rep_data.is_due()
+        """Check if card is due for review.
+        
+        Returns the status cached at construction or the last refresh_due(),
+        so call refresh_due() after changing rep_data.
+        """
+        return self._due
+    
+    def refresh_due(self, today: date | None = None) -> None:
+        """Recompute due status; call after updating rep_data."""
+        self._due = self.rep_data.is_due_for(today or date.today())
 
 
-@dataclass
+@dataclass(slots=True)
 class FlashCardDeck:
     """A collection of flashcards from one or more files."""
     cards: list[FlashCard] = field(default_factory=list)
     source_files: list[str] = field(default_factory=list)
+    reviewed_cards: list[FlashCard] = field(default_factory=list)  # Cards to save
+    _by_id: dict[str, FlashCard] | None = field(default=None, init=False, repr=False)
+    
+    def _index(self) -> dict[str, FlashCard]:
+        """Get the card_id -> FlashCard index, building it on first use."""
+        if self._by_id is None:
+            # First card wins on duplicate IDs, matching a linear scan
+            self._by_id = {}
+            for card in self.cards:
+                self._by_id.setdefault(card.id, card)
+        return self._by_id
+    
+    def invalidate_index(self) -> None:
+        """Drop the card index; call after mutating `cards`."""
+        self._by_id = None
+    
+    def mark_reviewed(self, card: FlashCard) -> None:
+        """Record that a card's repetition data changed and needs saving."""
+        self.reviewed_cards.append(card)
     
     def get_sections(self) -> list[str]:
-        """Get all unique sections."""
-        return sorted(set(card.section for card in self.cards))
+        """Get all unique sections, in the order they appear in the files."""
+        return list(dict.fromkeys(card.section for card in self.cards))
     
     def filter_by_section(self, section: str) -> list[FlashCard]:
         """Get cards from a specific section."""
@@ -129,14 +193,22 @@ class FlashCardDeck:
     
     def get_due_cards(self) -> list[FlashCard]:
         """Get all cards due for review."""
-        return [c for c in self.cards if c.is_due()]
+        return filter_due(self.cards)
     
     def get_card_by_id(self, card_id: str) -> FlashCard | None:
         """Find a card by its ID."""
-        for card in self.cards:
-            if card.id == card_id:
-                return card
-        return None
+        return self._index().get(card_id)
+
+
+def filter_due(cards: list[FlashCard], today: date | None = None) -> list[FlashCard]:
+    """Get the cards due for review.
+    
+    Uses each card's precomputed due status, unless `today` is given, in
+    which case due status is re-evaluated against that date.
+    """
+    if today is None:
+        return [c for c in cards if c._due]
+    return [c for c in cards if c.rep_data.is_due_for(today)]
 
 
 def find_flashcard_files(directory: str = ".") -> list[str]:
@@ -144,79 +216,149 @@ def find_flashcard_files(directory: str = ".") -> list[str]:
     
     Pattern: *_cards.tex
     """
-    pattern = os.path.join(directory, "*_cards.tex")
-    files = glob.glob(pattern)
-    return sorted(files)
+    # Like glob, skip hidden files; unlike glob, no per-entry fnmatch/stat
+    with os.scandir(directory) as it:
+        files = [os.path.join(directory, entry.name) for entry in it
+                 if entry.name.endswith("_cards.tex") and not entry.name.startswith(".")
+                 and entry.is_file()]
+    files.sort()
+    return files
+
+
+def _iter_card_blocks(content: str | mmap.mmap):
+    """Yield (position, card_id, body) for each flashcard environment.
+    
+    Scans with find rather than a DOTALL regex, so each body is sliced
+    out directly without backtracking. For an mmap, yields bytes.
+    """
+    if isinstance(content, str):
+        card_begin, card_end, brace = _CARD_BEGIN, _CARD_END, '}'
+    else:
+        card_begin, card_end, brace = _CARD_BEGIN_B, _CARD_END_B, b'}'
+    i = 0
+    while True:
+        begin = content.find(card_begin, i)
+        if begin < 0:
+            return
+        id_start = begin + len(card_begin)
+        id_end = content.find(brace, id_start)
+        if id_end < 0:
+            return
+        if id_end == id_start:
+            # Empty id - not a card
+            i = id_start
+            continue
+        end = content.find(card_end, id_end)
+        if end < 0:
+            return
+        yield begin, content[id_start:id_end], content[id_end + 1:end]
+        i = end + len(card_end)
 
 
 def parse_flashcard_file(filepath: str) -> tuple[list[FlashCard], dict[str, RepetitionData]]:
     """Parse a .tex flashcard file.
     
+    The text scan is cached per (path, mtime, size), so re-parsing an
+    unchanged file only rebuilds the card objects. Saving rep data changes
+    the mtime, which invalidates the cache entry.
+    
     Returns:
         Tuple of (list of FlashCards, dict of card_id -> RepetitionData)
     """
+    st = os.stat(filepath)
+    rep_entries, card_entries = _scan_file(filepath, st.st_mtime_ns, st.st_size)
+    
+    rep_data = {card_id: RepetitionData.from_string(rep_str) for card_id, rep_str in rep_entries}
+    
     cards: list[FlashCard] = []
-    rep_data: dict[str, RepetitionData] = {}
+    for card_id, question, answer, section in card_entries:
+        card = FlashCard(
+            id=card_id,
+            question=question,
+            answer=answer,
+            section=section,
+            source_file=filepath,
+            rep_data=rep_data.get(card_id, RepetitionData())
+        )
+        cards.append(card)
+    
+    return cards, rep_data
+
+
+@functools.lru_cache(maxsize=64)
+def _scan_file(filepath: str, mtime_ns: int, size: int) -> tuple[tuple, tuple]:
+    """Scan a file's raw rep and card entries; cached on the file's stat.
+    
+    Large files are memory-mapped, and only the captured spans decoded.
+    """
+    if size > _MMAP_THRESHOLD:
+        with open(filepath, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _scan_content(mm)
     
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
+    return _scan_content(content)
+
+
+def _decode(span: bytes) -> str:
+    """Decode a span captured from a mapped file.
     
-    # Extract repetition data from comments
-    # Format: %@rep:card-id:date:interval:ease:reps
-    rep_pattern = r'%@rep:([^:]+):(.+)'
-    for match in re.finditer(rep_pattern, content):
-        card_id = match.group(1)
-        rep_str = match.group(2)
-        rep_data[card_id] = RepetitionData.from_string(rep_str)
+    Newlines are normalized the way text-mode reading does, so both parse
+    paths give the same strings.
+    """
+    return span.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _scan_content(content: str | mmap.mmap) -> tuple[tuple, tuple]:
+    """Scan file content, either a str or a mapped file.
     
-    # Track current section
-    current_section = "General"
+    Returns:
+        Tuple of ((card_id, rep_str), ...) and
+        ((card_id, question, answer, section), ...)
+    """
+    if isinstance(content, str):
+        rep_re, section_re, decode = _REP_RE, _SECTION_RE, str
+    else:
+        rep_re, section_re, decode = _REP_RE_B, _SECTION_RE_B, _decode
     
-    # Find all sections
-    section_pattern = r'\\section\{([^}]+)\}'
-    sections = [(m.start(), m.group(1)) for m in re.finditer(section_pattern, content)]
+    # Extract repetition data from comments
+    rep_entries = tuple((decode(m.group(1)), decode(m.group(2))) for m in rep_re.finditer(content))
     
-    # Find all flashcards
-    # Pattern: \begin{flashcard}{id} ... \Q{...} ... \A{...} ... \end{flashcard}
-    card_pattern = r'\\begin\{flashcard\}\{([^}]+)\}(.*?)\\end\{flashcard\}'
+    # Find all sections (in file order, so positions are sorted)
+    sections = [(m.start(), decode(m.group(1))) for m in section_re.finditer(content)]
+    sec_positions = [pos for pos, _ in sections]
+    sec_names = [name for _, name in sections]
     
-    for match in re.finditer(card_pattern, content, re.DOTALL):
-        card_id = match.group(1).strip()
-        card_content = match.group(2)
-        card_pos = match.start()
+    # Find all flashcards
+    card_entries = []
+    for card_pos, card_id, card_content in _iter_card_blocks(content):
+        card_id = decode(card_id).strip()
+        card_content = decode(card_content)
         
         # Determine section based on position
-        for sec_pos, sec_name in reversed(sections):
-            if sec_pos < card_pos:
-                current_section = sec_name
-                break
+        i = bisect.bisect_right(sec_positions, card_pos) - 1
+        current_section = sec_names[i] if i >= 0 else "General"
         
         # Extract question - handle both \Q{...} and \Qblock{...}
-        q_match = re.search(r'\\Q(?:block)?\{((?:[^{}]|\{[^{}]*\})*)\}', card_content)
+        q_match = _Q_RE.search(card_content)
         question = q_match.group(1).strip() if q_match else ""
         
         # Extract answer - handle both \A{...} and \Ablock{...}
-        a_match = re.search(r'\\A(?:block)?\{((?:[^{}]|\{[^{}]*\})*)\}', card_content)
+        a_match = _A_RE.search(card_content)
         answer = a_match.group(1).strip() if a_match else ""
         
         if question and answer:
-            card = FlashCard(
-                id=card_id,
-                question=question,
-                answer=answer,
-                section=current_section,
-                source_file=filepath,
-                rep_data=rep_data.get(card_id, RepetitionData())
-            )
-            cards.append(card)
+            card_entries.append((card_id, question, answer, current_section))
     
-    return cards, rep_data
+    return rep_entries, tuple(card_entries)
 
 
 def save_repetition_data(filepath: str, cards: list[FlashCard]) -> None:
     """Update repetition data in a .tex file.
     
-    Adds or updates %@rep: comments after each flashcard.
+    Adds or updates %@rep: comments after each flashcard. The file is
+    only rewritten if its content actually changes.
     """
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
@@ -228,24 +370,23 @@ def save_repetition_data(filepath: str, cards: list[FlashCard]) -> None:
             rep_updates[card.id] = card.rep_data.to_string()
     
     # Remove existing rep data for cards we're updating
-    for card_id in rep_updates:
-        pattern = rf'%@rep:{re.escape(card_id)}:[^\n]*\n?'
-        content = re.sub(pattern, '', content)
-    
-    # Add new rep data after each flashcard
-    for card_id, rep_str in rep_updates.items():
-        # Find the end of this flashcard
-        pattern = rf'(\\end\{{flashcard\}})'
-        # We need to find the right one - search for the flashcard with this id
-        card_pattern = rf'(\\begin\{{flashcard\}}\{{{re.escape(card_id)}\}}.*?\\end\{{flashcard\}})'
-        
-        def add_rep_comment(match):
-            return f"{match.group(1)}\n%@rep:{card_id}:{rep_str}"
-        
-        content = re.sub(card_pattern, add_rep_comment, content, flags=re.DOTALL)
+    def strip_rep_comment(match):
+        return '' if match.group(1) in rep_updates else match.group(0)
+    
+    new_content = _REP_LINE_RE.sub(strip_rep_comment, content)
+    
+    # Add new rep data after each updated flashcard
+    def add_rep_comment(match):
+        card_id = match.group(1).strip()
+        if card_id not in rep_updates:
+            return match.group(0)
+        return f"{match.group(0)}\n%@rep:{card_id}:{rep_updates[card_id]}"
+    
+    new_content = _CARD_RE.sub(add_rep_comment, new_content)
     
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
+    if new_content != content:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(new_content)
 
 
 def load_deck_from_directory(directory: str = ".") -> FlashCardDeck:
@@ -253,19 +394,29 @@ def load_deck_from_directory(directory: str = ".") -> FlashCardDeck:
     deck = FlashCardDeck()
     
     files = find_flashcard_files(directory)
-    for filepath in files:
-        cards, _ = parse_flashcard_file(filepath)
+    if not files:
+        return deck
+    
+    # Files are independent, so read and parse them concurrently
+    with ThreadPoolExecutor(max_workers=min(8, len(files))) as ex:
+        results = list(ex.map(parse_flashcard_file, files))
+    
+    for filepath, (cards, _) in zip(files, results):
         deck.cards.extend(cards)
         deck.source_files.append(filepath)
+    deck.invalidate_index()
     
     return deck
 
 
 def save_deck(deck: FlashCardDeck) -> None:
-    """Save repetition data for all cards in the deck."""
-    # Group cards by source file
+    """Save repetition data for the deck's reviewed cards.
+    
+    Only files containing at least one reviewed card are touched.
+    """
+    # Group reviewed cards by source file
     by_file: dict[str, list[FlashCard]] = {}
-    for card in deck.cards:
+    for card in deck.reviewed_cards:
         if card.source_file:
             by_file.setdefault(card.source_file, []).append(card)
     
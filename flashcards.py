@@ -6,12 +6,19 @@ Uses matplotlib for LaTeX rendering and imgcat for terminal display.
 Loads flashcards from .tex files (*_cards.tex) in the current directory.
 """
 
+import functools
+import hashlib
 import io
 import random
+import subprocess
 import sys
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from imgcat import imgcat
 
 from card_parser import (
@@ -19,46 +26,162 @@ from card_parser import (
     load_deck_from_directory, save_deck, find_flashcard_files
 )
 
-# Enable full LaTeX rendering - requires LaTeX installation (e.g., MacTeX)
+# Cards are rendered with matplotlib's built-in mathtext first, which needs no
+# external programs. Enable full LaTeX as a fallback for cards mathtext can't
+# handle - requires LaTeX installation (e.g., MacTeX)
 # If you don't have LaTeX installed, set this to False
 USE_LATEX = True
 
-if USE_LATEX:
-    plt.rcParams.update({
-        "text.usetex": True,
-        "font.family": "serif",
-        "font.serif": ["Computer Modern Roman"],
-    })
+plt.rcParams.update({
+    "font.family": "serif",
+    "font.serif": ["Computer Modern Roman", "cmr10"],
+    "mathtext.fontset": "cm",
+    "axes.formatter.use_mathtext": True,  # Expected alongside cmr10
+})
+
+
+# Accepted answers to the recall rating prompt
+_VALID_RATINGS = frozenset({"1", "2", "3", "4", "5"})
+
+# Rendered PNGs are cached on disk, keyed by a hash of the text and settings
+LATEX_CACHE_DIR = Path(".cache/latex")
+
+# Minimal document for rendering a card straight through latex + dvipng
+# (varwidth so display math, environments and paragraphs typeset)
+LATEX_TEMPLATE = r"""\documentclass[border=4pt,varwidth]{standalone}
+\usepackage{amsmath,amssymb}
+\begin{document}
+%s
+\end{document}
+"""
+
+# One figure reused for every render, instead of building and tearing down a
+# figure per card. A plain Figure (not pyplot) so it can be drawn off the main
+# thread; the lock serializes access to it.
+_FIG = Figure(figsize=(8, 2))
+_AX = _FIG.subplots()
+_AX.axis('off')
+_FIG_LOCK = threading.Lock()
+
+
+def _draw_png(text: str, fontsize: int, parse_math: bool = True) -> bytes:
+    """Draw text on the shared figure with mathtext and return PNG bytes.
+    
+    With parse_math=False the text is drawn literally.
+    """
+    with _FIG_LOCK:
+        txt = _AX.text(
+            0.5, 0.5,
+            text,
+            fontsize=fontsize,
+            ha='center',
+            va='center',
+            transform=_AX.transAxes,
+            usetex=False,
+            parse_math=parse_math
+        )
+        
+        # Save to buffer
+        buf = io.BytesIO()
+        try:
+            _FIG.savefig(buf, format='png', bbox_inches='tight', 
+                         facecolor='white', edgecolor='none', dpi=150)
+        finally:
+            txt.remove()
+    return buf.getvalue()
+
+
+def _render_latex_direct(text: str, fontsize: int) -> bytes:
+    """Render text with latex + dvipng directly and return PNG bytes.
+    
+    Skips matplotlib entirely. The document is typeset at the standalone
+    class's 10pt and scaled up to `fontsize` via dvipng's resolution.
+    """
+    dpi = round(150 * fontsize / 10)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        (tmp / "card.tex").write_text(LATEX_TEMPLATE % text, encoding='utf-8')
+        subprocess.run(
+            ["latex", "-interaction=batchmode", "-halt-on-error", "card.tex"],
+            cwd=tmpdir, check=True, capture_output=True
+        )
+        subprocess.run(
+            ["dvipng", "-D", str(dpi), "-T", "tight", "-bg", "rgb 1.0 1.0 1.0",
+             "-o", "card.png", "card.dvi"],
+            cwd=tmpdir, check=True, capture_output=True
+        )
+        return (tmp / "card.png").read_bytes()
+
+
+def _try_latex_direct(text: str, fontsize: int) -> bytes | None:
+    """Like _render_latex_direct, but return None if LaTeX fails or is missing."""
+    try:
+        return _render_latex_direct(text, fontsize)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+
+
+def _is_simple(text: str) -> bool:
+    """Check whether mathtext can render text faithfully.
+    
+    mathtext only parses $...$ spans and draws everything else literally, so
+    any environment or backslash command outside math needs full LaTeX.
+    """
+    if "\\begin" in text:
+        return False
+    parts = text.split("$")
+    if len(parts) % 2 == 0:
+        return False  # Unbalanced $
+    # Even-indexed parts are outside math
+    return not any("\\" in part for part in parts[::2])
+
+
+@functools.lru_cache(maxsize=512)
+def _render_bytes(text: str, fontsize: int = 24) -> bytes:
+    """Render text to PNG bytes, reusing a cached image when available."""
+    key = hashlib.blake2b(f"{fontsize}|{USE_LATEX}|{text}".encode(), digest_size=16).hexdigest()
+    path = LATEX_CACHE_DIR / f"{key}.png"
+    if path.exists():
+        return path.read_bytes()
+    
+    data = None
+    if USE_LATEX and not _is_simple(text):
+        data = _try_latex_direct(text, fontsize)
+    else:
+        try:
+            data = _draw_png(text, fontsize)
+        except ValueError:
+            # mathtext couldn't parse it (e.g. an unsupported command)
+            if USE_LATEX:
+                data = _try_latex_direct(text, fontsize)
+    
+    if data is None:
+        # Couldn't typeset it (LaTeX missing or failed to compile): show the
+        # source instead of crashing the quiz. Not cached on disk, so it is
+        # retried next session.
+        return _draw_png(text, fontsize, parse_math=False)
+    
+    try:
+        LATEX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    except OSError:
+        pass  # Cache is best-effort
+    
+    return data
 
 
 def render_latex(text: str, fontsize: int = 24) -> None:
     """Render text with LaTeX math and display in terminal using imgcat.
     
-    With USE_LATEX=True, write naturally:
+    Write naturally:
         "Solve: $x^2 - 5x + 6 = 0$"
     
-    With USE_LATEX=False, everything must be in math mode:
-        r"$\\text{Solve: } x^2 - 5x + 6 = 0$"
+    Simple text (math only inside $...$, no environments) is rendered with
+    mathtext. With USE_LATEX=True, anything else - or anything mathtext
+    can't parse - is rendered with full LaTeX. Text that can't be typeset
+    either way is shown as its source.
     """
-    fig, ax = plt.subplots(figsize=(8, 2))
-    ax.axis('off')
-    ax.text(
-        0.5, 0.5,
-        text,
-        fontsize=fontsize,
-        ha='center',
-        va='center',
-        transform=ax.transAxes
-    )
-    
-    # Save to buffer and display with imgcat
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', bbox_inches='tight', 
-                facecolor='white', edgecolor='none', dpi=150)
-    buf.seek(0)
-    plt.close(fig)
-    
-    imgcat(buf.read())
+    imgcat(_render_bytes(text, fontsize))
 
 
 class FlashCardApp:
@@ -70,15 +193,32 @@ class FlashCardApp:
         else:
             self.deck = load_deck_from_directory(directory)
         
-        self.cards: list[FlashCard] = list(self.deck.cards)
+        # Quiz order as indices into deck.cards; shuffling and filtering
+        # rewrite this list rather than copying cards around
+        self._order: list[int] = list(range(len(self.deck.cards)))
         self.current_index = 0
         self.score = 0
         self.total_attempted = 0
-        self.reviewed_cards: list[FlashCard] = []  # Track for saving
+        self.reviewed_cards: list[FlashCard] = self.deck.reviewed_cards  # Track for saving
+        
+        # Single render worker: pre-renders upcoming cards while the user
+        # reads and rates the current one (also keeps matplotlib on one thread)
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        # Keyed by the text rendered, the only input to _render_bytes
+        self._prefetch: dict[str, Future[bytes]] = {}
+    
+    @property
+    def cards(self) -> list[FlashCard]:
+        """The cards currently in the quiz, in quiz order."""
+        return [self.deck.cards[i] for i in self._order]
+    
+    def _card_at(self, index: int) -> FlashCard:
+        """Get the card at a position in the quiz order."""
+        return self.deck.cards[self._order[index]]
     
     def shuffle(self) -> None:
         """Shuffle the flashcards."""
-        random.shuffle(self.cards)
+        random.shuffle(self._order)
         self.current_index = 0
     
     def get_sections(self) -> list[str]:
@@ -87,34 +227,46 @@ class FlashCardApp:
     
     def filter_by_section(self, section: str) -> None:
         """Filter cards to only show a specific section."""
-        self.cards = [c for c in self.cards if c.section == section]
+        cards = self.deck.cards
+        self._order = [i for i in self._order if cards[i].section == section]
         self.current_index = 0
     
     def filter_due_only(self) -> None:
         """Filter to only show cards due for review."""
-        self.cards = [c for c in self.cards if c.is_due()]
+        cards = self.deck.cards
+        self._order = [i for i in self._order if cards[i].is_due()]
         self.current_index = 0
     
+    def prefetch(self, text: str) -> None:
+        """Start rendering text in the background."""
+        if text not in self._prefetch:
+            self._prefetch[text] = self._pool.submit(_render_bytes, text)
+    
+    def _render(self, text: str) -> None:
+        """Display text, using its prefetched render if there is one."""
+        self.prefetch(text)
+        imgcat(self._prefetch.pop(text).result())
+    
     def show_question(self, card: FlashCard) -> None:
         """Display the question using LaTeX rendering."""
         print("\n" + "=" * 50)
         print("📝 QUESTION:")
         print("=" * 50)
-        render_latex(card.question)
+        self._render(card.question)
     
     def show_answer(self, card: FlashCard) -> None:
         """Display the answer using LaTeX rendering."""
         print("\n" + "-" * 50)
         print("✅ ANSWER:")
         print("-" * 50)
-        render_latex(card.answer)
+        self._render(card.answer)
     
     def run_quiz(self) -> None:
         """Run an interactive quiz session."""
         print("\n" + "🎓 " + "=" * 46 + " 🎓")
         print("       MATH FLASH CARDS")
         print("🎓 " + "=" * 46 + " 🎓")
-        print(f"\nTotal cards: {len(self.cards)}")
+        print(f"\nTotal cards: {len(self._order)}")
         print("\nCommands:")
         print("  [Enter] - Show answer")
         print("  [1-5]   - Rate recall (1=forgot, 5=perfect)")
@@ -123,20 +275,27 @@ class FlashCardApp:
         
         self.shuffle()
         
-        while self.current_index < len(self.cards):
-            card = self.cards[self.current_index]
+        while self.current_index < len(self._order):
+            card = self._card_at(self.current_index)
             
             due_info = "📅 DUE" if card.is_due() else "⏳ scheduled"
-            print(f"\n📌 Card {self.current_index + 1}/{len(self.cards)} "
+            print(f"\n📌 Card {self.current_index + 1}/{len(self._order)} "
                   f"[{card.section}] [{card.id}] {due_info}")
             
             self.show_question(card)
             
+            # Render ahead while the user is thinking
+            self.prefetch(card.answer)
+            if self.current_index + 1 < len(self._order):
+                self.prefetch(self._card_at(self.current_index + 1).question)
+            
             user_input = input("\nPress Enter to reveal answer (or 's' to skip, 'q' to quit): ").strip().lower()
             
             if user_input == 'q':
                 break
             elif user_input == 's':
+                # The answer won't be shown; don't hold its render
+                self._prefetch.pop(card.answer, None)
                 self.current_index += 1
                 continue
             
@@ -144,17 +303,15 @@ class FlashCardApp:
             
             while True:
                 result = input("\nRate your recall (1=forgot, 2=hard, 3=ok, 4=good, 5=perfect): ").strip()
-                if result in ['1', '2', '3', '4', '5']:
+                if result in _VALID_RATINGS:
                     quality = int(result)
-                    # Convert 1-5 to 0-5 scale for SM-2
-                    sm2_quality = quality  # 1->1, 2->2, 3->3, 4->4, 5->5
-                    if quality <= 2:
-                        sm2_quality = quality - 1  # 1->0, 2->1 (failures)
-                    else:
-                        sm2_quality = quality  # 3,4,5 stay same (successes)
+                    # Convert 1-5 to 0-5 scale for SM-2:
+                    # 1->0, 2->1 (failures); 3,4,5 stay same (successes)
+                    sm2_quality = quality - 1 if quality <= 2 else quality
                     
                     card.rep_data.update(sm2_quality)
-                    self.reviewed_cards.append(card)
+                    card.refresh_due()
+                    self.deck.mark_reviewed(card)
                     self.total_attempted += 1
                     
                     if quality >= 3:
@@ -165,13 +322,16 @@ class FlashCardApp:
                         print("📚 Card will be reviewed again soon!")
                     break
                 elif result == 'q':
-                    self.current_index = len(self.cards)
+                    self.current_index = len(self._order)
                     break
                 else:
                     print("Please enter 1-5")
             
             self.current_index += 1
         
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._prefetch.clear()
+        
         # Save progress
         if self.reviewed_cards:
             save_deck(self.deck)
@@ -230,22 +390,29 @@ def main():
     # Load deck
     app = FlashCardApp(directory=".")
     
-    if not app.cards:
+    if not app.deck.cards:
         print("\n⚠️  No cards parsed from files. Check file format.")
         return
     
-    print(f"\n📚 Loaded {len(app.cards)} cards")
+    print(f"\n📚 Loaded {len(app.deck.cards)} cards")
+    
+    # Count cards and due cards per section in a single pass
+    counts: dict[str, list[int]] = {}
+    for c in app.deck.cards:
+        entry = counts.setdefault(c.section, [0, 0])
+        entry[0] += 1
+        if c.is_due():
+            entry[1] += 1
     
     # Show due cards info
-    due_cards = app.deck.get_due_cards()
-    print(f"📅 Due for review: {len(due_cards)} cards")
+    due_total = sum(due_count for _, due_count in counts.values())
+    print(f"📅 Due for review: {due_total} cards")
     
-    # Section selection
-    sections = app.get_sections()
+    # Section selection (counts is keyed in file order, like get_sections)
+    sections = list(counts)
     print("\n📂 Sections:")
     for i, sec in enumerate(sections, 1):
-        count = len([c for c in app.cards if c.section == sec])
-        due_count = len([c for c in app.cards if c.section == sec and c.is_due()])
+        count, due_count = counts[sec]
         print(f"   {i}. {sec} ({count} cards, {due_count} due)")
     print(f"   {len(sections) + 1}. All sections")
     print(f"   {len(sections) + 2}. Due cards only")